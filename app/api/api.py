@@ -1,26 +1,49 @@
+import hashlib
+from concurrent.futures import Future
+from threading import Lock
 from typing import Annotated
 
 from fastapi import APIRouter, Path, Query, Request, Response
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
+from pydantic import AfterValidator
 
 from app.schemas.resumeio import Extension, PageSize
+from app.services.cache import pdf_cache
 from app.services.resumeio import ResumeioDownloader
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
 
+# PDFs currently being generated, by cache key, so concurrent identical requests share a single generation
+_inflight: dict[bytes, Future[bytes]] = {}
+_inflight_lock = Lock()
+
+
+def _validate_rendering_token(rendering_token: str) -> str:
+    """Check that a rendering token is ASCII alphanumeric, without going through a regex."""
+    if not (rendering_token.isascii() and rendering_token.isalnum()):
+        raise ValueError("Rendering token must be alphanumeric")
+    return rendering_token
+
+
+RenderingToken = Annotated[str, Path(min_length=24, max_length=24), AfterValidator(_validate_rendering_token)]
+
 
 @router.post("/download/{rendering_token}")
 def download_resume(
-    rendering_token: Annotated[str, Path(min_length=24, max_length=24, pattern="^[a-zA-Z0-9]{24}$")],
+    rendering_token: RenderingToken,
     image_size: Annotated[int, Query(gt=0)] = 3000,
     extension: Annotated[Extension, Query()] = Extension.jpeg,
     page_size: Annotated[PageSize, Query()] = PageSize.a4,
+    ocr: Annotated[bool, Query()] = False,
 ):
     """
     Download a resume from resume.io and return it as a PDF.
 
+    Generated PDFs are cached in memory for a short time, so repeated downloads with the same parameters are served
+    directly. Edits made to the resume in the meantime only show up once the cached PDF expires.
+
     Parameters
     ----------
     rendering_token : str
@@ -31,24 +54,115 @@ def download_resume(
         Image extension to download, by default "jpeg".
     page_size : PageSize, optional
         Target page size for the PDF, by default "a4".
+    ocr : bool, optional
+        Whether to run OCR to make the PDF text searchable, by default False.
 
     Returns
     -------
     fastapi.responses.Response
-        A PDF representation of the resume with appropriate headers for inline display.
+        A PDF representation of the resume with appropriate headers for inline display. The ``X-Cache`` header
+        reports whether it was served from the cache.
     """
-    resumeio = ResumeioDownloader(
-        rendering_token=rendering_token,
-        image_size=image_size,
-        extension=extension,
-        page_size=page_size,
-    )
+    cache_key = _cache_key(rendering_token, image_size, extension, page_size, ocr)
+    pdf = pdf_cache.get(cache_key)
+    was_hit = pdf is not None
+    if not was_hit:
+        resumeio = ResumeioDownloader(
+            rendering_token=rendering_token,
+            image_size=image_size,
+            extension=extension,
+            page_size=page_size,
+            ocr=ocr,
+        )
+        pdf = _generate_pdf(cache_key, resumeio)
     return Response(
-        resumeio.generate_pdf(),
-        headers={"Content-Disposition": f'inline; filename="{rendering_token}.pdf"'},
+        pdf,
+        headers={
+            "Content-Disposition": f'inline; filename="{rendering_token}.pdf"',
+            "X-Cache": "HIT" if was_hit else "MISS",
+        },
     )
 
 
+def _cache_key(rendering_token: str, image_size: int, extension: Extension, page_size: PageSize, ocr: bool) -> bytes:
+    """
+    Build a compact cache key for a PDF from the parameters it is generated with.
+
+    Parameters
+    ----------
+    rendering_token : str
+        Rendering Token of the resume.
+    image_size : int
+        Size of the images.
+    extension : Extension
+        Image extension.
+    page_size : PageSize
+        Target page size.
+    ocr : bool
+        Whether OCR is enabled.
+
+    Returns
+    -------
+    bytes
+        16-byte BLAKE2b digest of the parameters.
+    """
+    key = hashlib.blake2b(rendering_token.encode(), digest_size=16)
+    key.update(extension.value.encode())
+    key.update(b"\0")
+    key.update(page_size.value.encode())
+    key.update(b"\0")
+    key.update(b"\1" if ocr else b"\0")
+    # Last, so its variable length can't make two parameter sets collide
+    key.update(image_size.to_bytes((image_size.bit_length() + 7) // 8, "little"))
+    return key.digest()
+
+
+def _generate_pdf(cache_key: bytes, resumeio: ResumeioDownloader) -> bytes:
+    """
+    Generate and cache a PDF, coalescing concurrent requests for the same cache key.
+
+    The first caller for a key generates the PDF; callers arriving while it is in flight wait for and share its
+    result (or its exception) instead of generating it again.
+
+    Parameters
+    ----------
+    cache_key : bytes
+        Cache key of the PDF.
+    resumeio : ResumeioDownloader
+        Downloader used if this caller ends up generating the PDF.
+
+    Returns
+    -------
+    bytes
+        PDF representation of the resume.
+    """
+    with _inflight_lock:
+        future = _inflight.get(cache_key)
+        if future is None:
+            # The previous owner may have cached it between our cache miss and taking the lock
+            if (pdf := pdf_cache.get(cache_key)) is not None:
+                return pdf
+            future = _inflight[cache_key] = Future()
+            is_owner = True
+        else:
+            is_owner = False
+
+    if not is_owner:
+        return future.result()
+
+    try:
+        pdf = resumeio.generate_pdf()
+        pdf_cache.set(cache_key, pdf)
+        future.set_result(pdf)
+        return pdf
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[cache_key]
+
+
 @router.api_route("/", methods=["GET", "HEAD"], response_class=HTMLResponse, include_in_schema=False)
 def index(request: Request):
     """
@@ -1,9 +1,22 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 
 from app.api.api import router
+from app.services import resumeio
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Close the shared resume.io session and stop the page rendering workers on shutdown."""
+    yield
+    resumeio.RESUMEIO_SESSION.close()
+    # Looked up on shutdown, as the pool is replaced if one of its workers dies
+    resumeio.PAGE_POOL.shutdown()
+
 
-app = FastAPI(title="Resume.io to PDF")
+app = FastAPI(title="Resume.io to PDF", lifespan=lifespan)
 app.include_router(router)
 
 
@@ -0,0 +1,164 @@
+import heapq
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+
+
+@dataclass
+class CacheEntry:
+    """
+    A cached value along with its expiration time.
+
+    Parameters
+    ----------
+    value : bytes
+        Cached payload.
+    expires_at : float
+        Monotonic timestamp after which the entry is considered stale.
+    """
+
+    value: bytes
+    expires_at: float
+
+
+@dataclass
+class CacheShard:
+    """
+    One independently locked partition of the cache.
+
+    Parameters
+    ----------
+    entries : OrderedDict[bytes, CacheEntry]
+        Entries in recency order, least recently used first.
+    expirations : list[tuple[float, bytes]]
+        Min-heap of ``(expires_at, key)`` pairs. Pairs for replaced or evicted entries are left in place and
+        skipped when they surface.
+    size : int
+        Total size of the cached values, in bytes.
+    lock : threading.Lock
+        Lock guarding the entries, the heap and the size.
+    """
+
+    entries: OrderedDict[bytes, CacheEntry] = field(default_factory=OrderedDict)
+    expirations: list[tuple[float, bytes]] = field(default_factory=list)
+    size: int = 0
+    lock: Lock = field(default_factory=Lock)
+
+
+class PDFCache:
+    """
+    In-memory LRU cache with a time-to-live for generated PDFs.
+
+    Entries are kept in recency order, so lookups, inserts and evictions are all O(1). Keys are spread over
+    independently locked shards so that requests for unrelated resumes do not contend on a single lock.
+
+    The cache is bounded by the total size of the PDFs as well as by their number, as the size of a PDF grows with
+    the requested image size. Both limits are split evenly between the shards and enforced per shard: the cache
+    never holds more than ``max_entries`` entries or ``max_bytes`` bytes, but a shard may evict entries while the
+    cache as a whole is below its limits. Values larger than a shard's share of ``max_bytes`` are not cached at all.
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        Maximum number of entries to keep, at least ``shards``, by default 64. Rounded down to a multiple of
+        ``shards``.
+    max_bytes : int, optional
+        Maximum total size of the cached values, in bytes, by default 64 MiB.
+    ttl : float, optional
+        Number of seconds an entry stays valid, by default 60.
+    shards : int, optional
+        Number of shards, must be a power of two, by default 4.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 64,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 60,
+        shards: int = 4,
+    ) -> None:
+        if shards < 1 or shards & (shards - 1):
+            raise ValueError("shards must be a power of two")
+        if max_entries < shards:
+            raise ValueError("max_entries must be at least the number of shards")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._mask = shards - 1
+        self._shard_max_entries = max_entries // shards
+        self._shard_max_bytes = max_bytes // shards
+        self._shards = [CacheShard() for _ in range(shards)]
+
+    def get(self, key: bytes) -> bytes | None:
+        """
+        Get a cached value.
+
+        Parameters
+        ----------
+        key : bytes
+            Cache key.
+
+        Returns
+        -------
+        bytes | None
+            The cached value, or None if it is missing or expired.
+        """
+        shard = self._shards[hash(key) & self._mask]
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                del shard.entries[key]
+                shard.size -= len(entry.value)
+                return None
+            shard.entries.move_to_end(key)
+            return entry.value
+
+    def set(self, key: bytes, value: bytes) -> None:
+        """
+        Store a value, evicting the least recently used entries if its shard is full.
+
+        Values larger than a shard's share of ``max_bytes`` are not stored.
+
+        Parameters
+        ----------
+        key : bytes
+            Cache key.
+        value : bytes
+            Value to cache.
+        """
+        shard = self._shards[hash(key) & self._mask]
+        with shard.lock:
+            expires_at = time.monotonic() + self.ttl
+            if (previous := shard.entries.pop(key, None)) is not None:
+                shard.size -= len(previous.value)
+            if len(value) > self._shard_max_bytes:
+                return
+            shard.entries[key] = CacheEntry(value=value, expires_at=expires_at)
+            shard.size += len(value)
+            heapq.heappush(shard.expirations, (expires_at, key))
+            # Swept on every insert so the heap does not keep growing with pairs for replaced or expired entries
+            self._cleanup_expired(shard)
+            while len(shard.entries) > self._shard_max_entries or shard.size > self._shard_max_bytes:
+                _, evicted = shard.entries.popitem(last=False)
+                shard.size -= len(evicted.value)
+
+    @staticmethod
+    def _cleanup_expired(shard: CacheShard) -> None:
+        """
+        Drop expired entries from a shard. Must be called with the shard lock held.
+
+        Only heap items that have actually expired are visited, so a sweep costs O(k log n) for k expired items.
+        """
+        now = time.monotonic()
+        while shard.expirations and shard.expirations[0][0] <= now:
+            expires_at, key = heapq.heappop(shard.expirations)
+            entry = shard.entries.get(key)
+            if entry is not None and entry.expires_at == expires_at:
+                del shard.entries[key]
+                shard.size -= len(entry.value)
+
+
+pdf_cache = PDFCache()
@@ -1,16 +1,81 @@
 import io
-import json
+import multiprocessing
+import os
+import subprocess
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from threading import Lock
 
-import pytesseract
+import img2pdf
+import orjson
 import requests
 from fastapi import HTTPException
 from PIL import Image
 from pypdf import PdfReader, PdfWriter, Transformation
 from pypdf.annotations import Link
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from app.schemas.resumeio import Extension, PageSize, PAGE_DIMENSIONS
+from app.schemas.resumeio import PAGE_DIMENSIONS, Extension, PageSize
+
+# Pages are rendered in parallel, so keep each Tesseract process single-threaded to avoid oversubscribing the CPUs
+TESSERACT_ENV = {**os.environ, "OMP_THREAD_LIMIT": "1"}
+
+
+def _new_page_pool() -> ProcessPoolExecutor:
+    """Start worker processes rendering pages. Spawned rather than forked, as the web server process has threads."""
+    return ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+
+
+# Worker processes rendering pages. Replaced by `_restart_page_pool` if one of them dies
+PAGE_POOL = _new_page_pool()
+# Guards replacing `PAGE_POOL`, so concurrent requests finding it broken only start one new pool
+_PAGE_POOL_LOCK = Lock()
+
+# Size embedded pages as if the images were 300 DPI, matching the pages Tesseract produces with `--dpi 300`
+EMBED_LAYOUT = img2pdf.get_fixed_dpi_layout_fun((300, 300))
+
+# Layouts placing the images straight onto pages of each size, scaled to fit and centered
+PAGE_LAYOUTS = {
+    PageSize.original: EMBED_LAYOUT,
+    **{
+        page_size: img2pdf.get_layout_fun(pagesize=dims, fit=img2pdf.FitMode.into)
+        for page_size, dims in PAGE_DIMENSIONS.items()
+    },
+}
+
+# Maximum number of page images downloaded at once for a single resume, to avoid being throttled by resume.io
+MAX_CONCURRENT_DOWNLOADS = 5
+
+# Shared across requests so connections (and TLS sessions) to resume.io are kept alive and reused
+RESUMEIO_SESSION = requests.Session()
+# The default pool keeps only 10 connections per host and discards the rest, so concurrent downloads would keep
+# opening new ones
+RESUMEIO_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=64,
+        # Back off exponentially and retry when throttled; a final 429 is still returned to the caller. Retry-After
+        # is ignored, as urllib3 does not cap it and a long one would hold the request (and its waiters) for as long
+        max_retries=Retry(
+            total=3,
+            status_forcelist=[429],
+            backoff_factor=1,
+            backoff_max=4,
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        ),
+    ),
+)
+RESUMEIO_SESSION.headers["User-Agent"] = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/136.0.0.0 Safari/537.36"
+)
 
 
 @dataclass
@@ -28,125 +93,172 @@ class ResumeioDownloader:
         Size of the images to download, by default 3000.
     page_size : PageSize, optional
         Target page size for the PDF, by default "a4".
+    ocr : bool, optional
+        Whether to run OCR to add a searchable text layer, by default False.
+    session : requests.Session, optional
+        HTTP session used to talk to resume.io, by default the shared ``RESUMEIO_SESSION``.
     """
 
     rendering_token: str
     extension: Extension = Extension.jpeg
     image_size: int = 3000
     page_size: PageSize = PageSize.a4
+    ocr: bool = False
+    session: requests.Session = field(default=RESUMEIO_SESSION, repr=False)
     METADATA_URL: str = field(default="https://ssr.resume.tools/meta/{rendering_token}?cache={cache_date}", repr=False)
     IMAGES_URL: str = field(default=(
         "https://ssr.resume.tools/to-image/{rendering_token}-{page_id}.{extension}?cache={cache_date}&size={image_size}"
     ), repr=False)
 
     def __post_init__(self) -> None:
-        """Set the cache date to the current time."""
+        """Set the cache date to the current time and fill in the parts of the image URL shared by all pages."""
         self.cache_date = datetime.now(timezone.utc).isoformat()[:-10] + "Z"
+        # Leaves only `{page_id}` to be formatted per page
+        self.__image_url = self.IMAGES_URL.format(
+            rendering_token=self.rendering_token,
+            page_id="{page_id}",
+            extension=self.extension.value,
+            cache_date=self.cache_date,
+            image_size=self.image_size,
+        )
 
     def generate_pdf(self) -> bytes:
         """
         Generate a PDF from the resume.io resume.
 
+        Without OCR, all images are laid out at the target page size in a single pass, and only the link
+        annotations are added afterwards.
+
+        With OCR enabled, the pages are split into at most one batch per CPU, and each batch is OCRed by a single
+        Tesseract process, so the Tesseract start-up and model loading are not paid for every page. Each batch is
+        rendered into one multi-page PDF in a ``PAGE_POOL`` worker process, so this CPU-heavy work neither holds the
+        GIL nor blocks other requests, and the batches are appended together before adding the links.
+
         Returns
         -------
         bytes
             PDF representation of the resume.
+
+        Raises
+        ------
+        HTTPException
+            If Tesseract fails on a page, or a rendering worker dies.
         """
         self.__get_resume_metadata()
         images = self.__download_images()
-        pdf = PdfWriter()
-        metadata_w, metadata_h = self.metadata[0].get("viewport").values()
+        viewport = tuple(self.metadata[0].get("viewport").values())
+        target_dims = PAGE_DIMENSIONS.get(self.page_size) if self.page_size != PageSize.original else None
+
+        if not self.ocr:
+            # Without a text layer to merge, the whole resume is laid out at its final size in one call. Done in
+            # this thread, as it mostly copies the encoded images, and sending them to a worker costs more
+            pdf = PdfWriter(clone_from=io.BytesIO(_render_resume(images, self.page_size)))
+        else:
+            # OCR at 300 DPI for the page size described by the metadata, rather than at the (larger) download size
+            ocr_width = int(viewport[0] * 300 / 72)
+            batch_count = min(len(images), os.cpu_count() or 1)
+            bounds = [len(images) * batch // batch_count for batch in range(batch_count + 1)]
+            batches = self.__run_in_page_pool(
+                _render_ocr_resume,
+                [(images[start:end], ocr_width, self.page_size) for start, end in zip(bounds, bounds[1:])],
+            )
+            # Each batch comes back as one multi-page PDF, so its objects are cloned into the writer in a single pass
+            pdf = PdfWriter()
+            for batch_pdf in batches:
+                pdf.append(io.BytesIO(batch_pdf))
 
+        # Only the page contents are final at this point; the link annotations are added on top of them
         for i, image in enumerate(images):
-            page_pdf = pytesseract.image_to_pdf_or_hocr(Image.open(image), extension="pdf", config="--dpi 300")
-            page = PdfReader(io.BytesIO(page_pdf)).pages[0]
-            
-            # Get original page dimensions
-            orig_width = float(page.mediabox.width)
-            orig_height = float(page.mediabox.height)
-            
-            # Calculate scale for link positioning (based on metadata)
-            page_scale = max(orig_height / metadata_h, orig_width / metadata_w)
-            
-            # Apply page size transformation if not original
-            if self.page_size != PageSize.original and self.page_size in PAGE_DIMENSIONS:
-                target_width, target_height = PAGE_DIMENSIONS[self.page_size]
-                
-                # Calculate scale to fit content in target page size while maintaining aspect ratio
-                scale_x = target_width / orig_width
-                scale_y = target_height / orig_height
-                scale = min(scale_x, scale_y)  # Fit within bounds
-                
-                # Calculate centering offsets
-                new_width = orig_width * scale
-                new_height = orig_height * scale
-                offset_x = (target_width - new_width) / 2
-                offset_y = (target_height - new_height) / 2
-                
-                # Apply transformation: scale and translate
-                transform = Transformation().scale(scale, scale).translate(offset_x, offset_y)
-                page.add_transformation(transform)
-                
-                # Update mediabox to target size
-                page.mediabox.lower_left = (0, 0)
-                page.mediabox.upper_right = (target_width, target_height)
-                
-                # Update link scale for the scaled page
-                link_scale = page_scale * scale
-                link_offset_x = offset_x
-                link_offset_y = offset_y
-            else:
-                link_scale = page_scale
-                link_offset_x = 0
-                link_offset_y = 0
-            
-            pdf.add_page(page)
-
-            for link in self.metadata[i].get("links"):
-                link_url = link.pop("url")
-                link.update((k, v * link_scale) for k, v in link.items())
-                x, y, w, h = link.values()
-                
-                # Apply offset for centered content
-                x += link_offset_x
-                y += link_offset_y
-
-                link_annotation = Link(rect=(x, y, x + w, y + h), url=link_url)
-                pdf.add_annotation(page_number=i, annotation=link_annotation)
+            # Only the image header is read, to get its size
+            width, height = Image.open(io.BytesIO(image)).size
+            page_dims = (width * 72 / 300, height * 72 / 300)
+            for rect, link_url in _link_rects(self.metadata[i].get("links"), viewport, page_dims, target_dims):
+                pdf.add_annotation(page_number=i, annotation=Link(rect=rect, url=link_url))
 
         with io.BytesIO() as file:
             pdf.write(file)
             return file.getvalue()
 
+    def __run_in_page_pool[T](self, fn: Callable[..., T], args: list[tuple]) -> list[T]:
+        """Run tasks in ``PAGE_POOL`` and wait for their results.
+
+        A pool that was broken by an earlier request is replaced and the tasks submitted again, as none of them ran.
+        If a worker dies while running one of these tasks, the pool is replaced for the following requests and only
+        this one fails.
+
+        Parameters
+        ----------
+        fn : Callable[..., T]
+            Function to run, once per task.
+        args : list[tuple]
+            Positional arguments of each task.
+
+        Returns
+        -------
+        list[T]
+            Result of each task, in order.
+
+        Raises
+        ------
+        HTTPException
+            If Tesseract failed while running a task, or a worker died.
+        """
+        pool = PAGE_POOL
+        try:
+            futures = [pool.submit(fn, *task_args) for task_args in args]
+        except BrokenProcessPool:
+            pool = _restart_page_pool(pool)
+            futures = [pool.submit(fn, *task_args) for task_args in args]
+
+        try:
+            return [future.result() for future in futures]
+        except BrokenProcessPool:
+            # e.g. killed for running out of memory; the pool is unusable from then on
+            _restart_page_pool(pool)
+            raise HTTPException(
+                status_code=500,
+                detail=f"Unable to generate PDF (rendering token: {self.rendering_token})",
+            )
+        except subprocess.CalledProcessError:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Unable to generate PDF (rendering token: {self.rendering_token})",
+            )
+
     def __get_resume_metadata(self) -> None:
         """Download the metadata for the resume."""
         response = self.__get(
             self.METADATA_URL.format(rendering_token=self.rendering_token, cache_date=self.cache_date),
         )
-        content: dict[str, list] = json.loads(response.text)
+        content: dict[str, list] = orjson.loads(response.content)
         self.metadata = content.get("pages")
 
-    def __download_images(self) -> list[io.BytesIO]:
-        """Download the images for the resume.
+    def __download_images(self) -> list[bytes]:
+        """Download the images for the resume, up to ``MAX_CONCURRENT_DOWNLOADS`` at a time.
 
         Returns
         -------
-        list[io.BytesIO]
-            List of image files.
+        list[bytes]
+            List of encoded images.
         """
-        images = []
-        for page_id in range(1, 1 + len(self.metadata)):
-            image_url = self.IMAGES_URL.format(
-                rendering_token=self.rendering_token,
-                page_id=page_id,
-                extension=self.extension.value,
-                cache_date=self.cache_date,
-                image_size=self.image_size,
-            )
-            response = self.__get(image_url)
-            images.append(io.BytesIO(response.content))
+        page_ids = range(1, 1 + len(self.metadata))
+        with ThreadPoolExecutor(max_workers=min(len(page_ids), MAX_CONCURRENT_DOWNLOADS)) as executor:
+            return list(executor.map(self.__download_image, page_ids))
 
-        return images
+    def __download_image(self, page_id: int) -> bytes:
+        """Download the image of a single page.
+
+        Parameters
+        ----------
+        page_id : int
+            Page number, starting at 1.
+
+        Returns
+        -------
+        bytes
+            Encoded image, as downloaded.
+        """
+        return self.__get(self.__image_url.format(page_id=page_id)).content
 
     def __get(self, url: str) -> requests.Response:
         """Get a response from a URL.
@@ -166,17 +278,235 @@ class ResumeioDownloader:
         HTTPException
             If the response status code is not 200.
         """
-        response = requests.get(
-            url,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/136.0.0.0 Safari/537.36",
-            },
-        )
+        response = self.session.get(url, timeout=30)
         if response.status_code != 200:
             raise HTTPException(
                 status_code=response.status_code,
                 detail=f"Unable to download resume (rendering token: {self.rendering_token})",
             )
         return response
+
+
+def _restart_page_pool(broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+    """
+    Replace a broken ``PAGE_POOL``, unless another request already did.
+
+    Parameters
+    ----------
+    broken : concurrent.futures.ProcessPoolExecutor
+        Pool found to be broken.
+
+    Returns
+    -------
+    concurrent.futures.ProcessPoolExecutor
+        Pool to use from now on.
+    """
+    global PAGE_POOL
+    with _PAGE_POOL_LOCK:
+        if PAGE_POOL is broken:
+            PAGE_POOL = _new_page_pool()
+            broken.shutdown(wait=False)
+        return PAGE_POOL
+
+
+def _render_resume(images: list[bytes], page_size: PageSize) -> bytes:
+    """
+    Render all resume pages at the target page size in a single pass.
+
+    The images are laid out directly at their final size, so the pages never need to be transformed afterwards.
+
+    Parameters
+    ----------
+    images : list[bytes]
+        Encoded page images.
+    page_size : PageSize
+        Target page size.
+
+    Returns
+    -------
+    bytes
+        PDF with one page per image.
+    """
+    return img2pdf.convert(images, layout_fun=PAGE_LAYOUTS[page_size])
+
+
+def _render_ocr_resume(images: list[bytes], ocr_width: int, page_size: PageSize) -> bytes:
+    """
+    Render a batch of resume pages at the target page size, with their OCR text layers.
+
+    The images are laid out by ``_render_resume`` and the text layers from ``_ocr_text_layers`` are merged over them,
+    scaled to the same size. Runs in a ``PAGE_POOL`` worker process.
+
+    Parameters
+    ----------
+    images : list[bytes]
+        Encoded page images.
+    ocr_width : int
+        Width, in pixels, to downsample the images to before running OCR.
+    page_size : PageSize
+        Target page size.
+
+    Returns
+    -------
+    bytes
+        PDF with one page per image.
+
+    Raises
+    ------
+    subprocess.CalledProcessError
+        If Tesseract fails.
+    """
+    text_pages = PdfReader(io.BytesIO(_ocr_text_layers(images, ocr_width))).pages
+    writer = PdfWriter(clone_from=io.BytesIO(_render_resume(images, page_size)))
+    for page, text_page in zip(writer.pages, text_pages):
+        # The transformation is added to the text layer operators that merging parses anyway; the image content is
+        # left as is
+        scale, offset_x, offset_y = _fit(
+            (float(text_page.mediabox.width), float(text_page.mediabox.height)),
+            (float(page.mediabox.width), float(page.mediabox.height)),
+        )
+        page.merge_transformed_page(text_page, Transformation().scale(scale, scale).translate(offset_x, offset_y))
+
+    with io.BytesIO() as file:
+        writer.write(file)
+        return file.getvalue()
+
+
+def _fit(page_dims: tuple[float, float], target_dims: tuple[float, float]) -> tuple[float, float, float]:
+    """
+    Get the transformation fitting a page into the target page size while maintaining its aspect ratio.
+
+    Parameters
+    ----------
+    page_dims : tuple[float, float]
+        Width and height of the page, in points.
+    target_dims : tuple[float, float]
+        Width and height of the target page size, in points.
+
+    Returns
+    -------
+    tuple[float, float, float]
+        Scale, and horizontal and vertical offsets centering the scaled page.
+    """
+    orig_width, orig_height = page_dims
+    target_width, target_height = target_dims
+
+    # Calculate scale to fit content in target page size while maintaining aspect ratio
+    scale = min(target_width / orig_width, target_height / orig_height)
+
+    # Calculate centering offsets
+    offset_x = (target_width - orig_width * scale) / 2
+    offset_y = (target_height - orig_height * scale) / 2
+    return scale, offset_x, offset_y
+
+
+def _link_rects(
+    links: list[dict],
+    viewport: tuple[float, float],
+    page_dims: tuple[float, float],
+    target_dims: tuple[float, float] | None,
+) -> list[tuple[tuple[float, float, float, float], str]]:
+    """
+    Place the links of a page.
+
+    Parameters
+    ----------
+    links : list[dict]
+        Links of the page, as given by the resume metadata. Left untouched.
+    viewport : tuple[float, float]
+        Width and height of the resume metadata viewport.
+    page_dims : tuple[float, float]
+        Width and height of the page at its original size, in points.
+    target_dims : tuple[float, float] | None
+        Width and height of the target page size, in points, or None to keep the original page size.
+
+    Returns
+    -------
+    list[tuple[tuple[float, float, float, float], str]]
+        Rectangle and URL of each link.
+    """
+    metadata_w, metadata_h = viewport
+    orig_width, orig_height = page_dims
+
+    # Calculate scale for link positioning (based on metadata)
+    link_scale = max(orig_height / metadata_h, orig_width / metadata_w)
+    link_offset_x = link_offset_y = 0.0
+    if target_dims is not None:
+        # Update link scale for the scaled page
+        scale, link_offset_x, link_offset_y = _fit(page_dims, target_dims)
+        link_scale *= scale
+
+    link_rects = []
+    for link in links:
+        # Scale the geometry into locals rather than rewriting the metadata dict in place. It is taken by the order
+        # of the values, as the names of the geometry keys are not pinned down anywhere
+        x, y, w, h = (v * link_scale for k, v in link.items() if k != "url")
+
+        # Apply offset for centered content
+        x += link_offset_x
+        y += link_offset_y
+
+        link_rects.append(((x, y, x + w, y + h), link["url"]))
+    return link_rects
+
+
+def _ocr_text_layers(images: list[bytes], ocr_width: int) -> bytes:
+    """
+    Run Tesseract once on a batch of page images and get back invisible, searchable text layers for them.
+
+    Tesseract only needs ~300 DPI grayscale input, so larger images are downsampled to about ``ocr_width`` and
+    converted to grayscale first; the full quality images are embedded separately. Each text layer page has about
+    the same size as the page produced by ``EMBED_LAYOUT`` for the original image.
+
+    Parameters
+    ----------
+    images : list[bytes]
+        Encoded page images.
+    ocr_width : int
+        Width, in pixels, to downsample the images to before running OCR.
+
+    Returns
+    -------
+    bytes
+        Text-only PDF with one page per image.
+
+    Raises
+    ------
+    subprocess.CalledProcessError
+        If Tesseract fails.
+    """
+    # Opening only reads the headers, so the sizes are known before anything is decoded
+    imgs = [Image.open(io.BytesIO(image)) for image in images]
+    widest = max(img.width for img in imgs)
+    dpi = 300
+    if widest > ocr_width * 1.1:
+        # A single, integer DPI applies to the whole batch, so derive each resized width from it to keep the page
+        # sizes exact
+        dpi = round(300 * ocr_width / widest)
+
+    pages = []
+    for img in imgs:
+        width = round(img.width * dpi / 300)
+        size = (width, round(img.height * width / img.width))
+        # JPEGs are decoded straight to grayscale and at the smallest 1/2, 1/4 or 1/8 scale still covering the
+        # target size; other formats ignore this and are decoded in full
+        img.draft("L", size)
+        img = img.convert("L")
+        if img.size != size:
+            img = img.resize(size, Image.Resampling.LANCZOS)
+        pages.append(img)
+
+    # Pages are handed over as a single uncompressed multi-page TIFF: no compression on our side or decoding on
+    # Tesseract's, and Tesseract processes every page of it in one run
+    with io.BytesIO() as file:
+        pages[0].save(file, "TIFF", save_all=True, append_images=pages[1:])
+        tiff = file.getvalue()
+
+    # The images are piped through stdin and the PDF read from stdout, so nothing is written to disk
+    return subprocess.run(
+        ["tesseract", "stdin", "stdout", "--dpi", str(dpi), "-c", "textonly_pdf=1", "pdf"],
+        input=tiff,
+        capture_output=True,
+        check=True,
+        env=TESSERACT_ENV,
+    ).stdout